@@ -1,13 +1,21 @@
-import React, { useState, useRef } from 'react';
+import React, { useState, useRef, lazy, Suspense } from 'react';
 import { AnalysisState, VerificationResult } from './types';
 import {
   analyzeFlyer,
-  fileToGenerativePart,
   verifyTextClaim,
 } from './services/geminiService';
 import AnalysisStatus from './components/AnalysisStatus';
-import ReportDashboard from './components/ReportDashboard';
-import MonitoringDashboard from './components/MonitoringDashboard';
+import ErrorPanel from './components/ErrorPanel';
+import ReportErrorBoundary from './components/ReportErrorBoundary';
+
+// Pulls in recharts via RiskGauge; only needed once a result is ready, so it
+// is fetched while the analysis runs rather than on first paint
+const loadReportDashboard = () => import('./components/ReportDashboard');
+const ReportDashboard = lazy(loadReportDashboard);
+
+// Only guards decode memory; uploads are downscaled before they are sent, and
+// the inline payload limit is enforced on the result in analyzeFlyer
+const MAX_UPLOAD_BYTES = 50 * 1024 * 1024;
 
 const App: React.FC = () => {
   const [state, setState] = useState<AnalysisState>({
@@ -29,35 +37,35 @@ const App: React.FC = () => {
     const file = event.target.files?.[0];
     if (!file) return;
 
+    if (file.size > MAX_UPLOAD_BYTES) {
+      setState({
+        status: 'error',
+        progressStep: '',
+        error: `Image is too large (max ${MAX_UPLOAD_BYTES / (1024 * 1024)}MB).`,
+      });
+      return;
+    }
+
     // Reset state
     setState({
       status: 'analyzing',
-      progressStep: 'Initializing Vision Module...',
-      imagePreview: URL.createObjectURL(file),
+      progressStep: 'Processing Image Data...',
     });
+    // Prefetch only; a failure surfaces through ReportErrorBoundary
+    loadReportDashboard().catch(() => {});
 
     try {
-      // 1. Convert image
-      setState((prev) => ({
-        ...prev,
-        progressStep: 'Processing Image Data...',
-      }));
-      const base64Data = await fileToGenerativePart(file);
+      // 1. Convert image and send to Gemini
+      const result = await analyzeFlyer(file, (progressStep) =>
+        setState((prev) => ({ ...prev, progressStep }))
+      );
 
-      // 2. Send to Gemini
-      setState((prev) => ({
-        ...prev,
-        progressStep: 'Scanning for Entities & Searching Database...',
-      }));
-      const result = await analyzeFlyer(base64Data, file.type);
-
-      // 3. Complete
-      setState((prev) => ({
+      // 2. Complete
+      setState({
         status: 'complete',
         progressStep: 'Analysis Complete',
         result: result,
-        imagePreview: prev.imagePreview,
-      }));
+      });
 
       // Trigger feed update
       setLastResult(result);
@@ -76,14 +84,12 @@ const App: React.FC = () => {
 
     setState({
       status: 'analyzing',
-      progressStep: 'Initializing Text Analysis Module...',
+      progressStep: 'Cross-referencing with Global News Network...',
     });
+    // Prefetch only; a failure surfaces through ReportErrorBoundary
+    loadReportDashboard().catch(() => {});
 
     try {
-      setState((prev) => ({
-        ...prev,
-        progressStep: 'Cross-referencing with Global News Network...',
-      }));
       const result = await verifyTextClaim(textInput);
 
       setState((prev) => ({
@@ -323,25 +329,27 @@ const App: React.FC = () => {
           )}
 
           {state.status === 'error' && (
-            <div className="max-w-xl w-full p-6 bg-red-950/30 border border-red-500/50 rounded-xl text-center space-y-4 mb-12">
-              <div className="text-red-500 text-3xl">
-                <i className="fas fa-exclamation-triangle"></i>
-              </div>
-              <h3 className="text-xl font-bold text-white">
-                Verification Failed
-              </h3>
-              <p className="text-red-200">{state.error}</p>
-              <button
-                onClick={handleReset}
-                className="px-6 py-2 bg-red-900/50 hover:bg-red-900 rounded border border-red-700 text-red-100 transition-colors"
-              >
-                Try Again
-              </button>
-            </div>
+            <ErrorPanel
+              title="Verification Failed"
+              message={state.error}
+              actionLabel="Try Again"
+              onAction={handleReset}
+            />
           )}
 
           {state.status === 'complete' && state.result && (
-            <ReportDashboard result={state.result} onReset={handleReset} />
+            <ReportErrorBoundary>
+              <Suspense
+                fallback={
+                  <AnalysisStatus
+                    status="analyzing"
+                    step="Preparing Report..."
+                  />
+                }
+              >
+                <ReportDashboard result={state.result} onReset={handleReset} />
+              </Suspense>
+            </ReportErrorBoundary>
           )}
 
           {/* Real-Time Monitoring Feed - Appended below main content */}
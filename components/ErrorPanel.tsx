@@ -0,0 +1,33 @@
+import React from 'react';
+
+interface ErrorPanelProps {
+  title: string;
+  message?: string;
+  actionLabel: string;
+  onAction: () => void;
+}
+
+const ErrorPanel: React.FC<ErrorPanelProps> = ({
+  title,
+  message,
+  actionLabel,
+  onAction,
+}) => {
+  return (
+    <div className="max-w-xl w-full p-6 bg-red-950/30 border border-red-500/50 rounded-xl text-center space-y-4 mb-12">
+      <div className="text-red-500 text-3xl">
+        <i className="fas fa-exclamation-triangle"></i>
+      </div>
+      <h3 className="text-xl font-bold text-white">{title}</h3>
+      <p className="text-red-200">{message}</p>
+      <button
+        onClick={onAction}
+        className="px-6 py-2 bg-red-900/50 hover:bg-red-900 rounded border border-red-700 text-red-100 transition-colors"
+      >
+        {actionLabel}
+      </button>
+    </div>
+  );
+};
+
+export default ErrorPanel;
@@ -1,5 +1,5 @@
-import React, { useState, useEffect, useCallback } from 'react';
-import { Claim, ClaimSource, Verdict, VerificationResult } from '../types';
+import React, { useState, useEffect } from 'react';
+import { Claim, Verdict, VerificationResult } from '../types';
 import RealTimeFeed from './RealTimeFeed';
 import StatsPanel from './StatsPanel';
 import ImpactVisualization from './ImpactVisualization';
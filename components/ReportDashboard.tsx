@@ -7,26 +7,24 @@ interface ReportDashboardProps {
   onReset: () => void;
 }
 
-const ReportDashboard: React.FC<ReportDashboardProps> = ({ result, onReset }) => {
-  const getVerdictColor = (verdict: Verdict) => {
-    switch (verdict) {
-      case Verdict.SAFE: return 'text-emerald-400 border-emerald-500/30 bg-emerald-950/20';
-      case Verdict.SUSPICIOUS: return 'text-amber-400 border-amber-500/30 bg-amber-950/20';
-      case Verdict.SCAM: return 'text-red-500 border-red-500/30 bg-red-950/20';
-      default: return 'text-slate-400';
-    }
-  };
+const VERDICT_COLORS: Readonly<Record<string, string>> = {
+  [Verdict.SAFE]: 'text-emerald-400 border-emerald-500/30 bg-emerald-950/20',
+  [Verdict.SUSPICIOUS]: 'text-amber-400 border-amber-500/30 bg-amber-950/20',
+  [Verdict.SCAM]: 'text-red-500 border-red-500/30 bg-red-950/20',
+};
+
+const ENTITY_ICONS: Readonly<Record<string, string>> = {
+  [EntityType.PHONE]: 'fa-phone',
+  [EntityType.URL]: 'fa-link',
+  [EntityType.EMAIL]: 'fa-envelope',
+  [EntityType.CRYPTO_WALLET]: 'fa-wallet',
+};
+
+const getVerdictColor = (verdict: Verdict) => VERDICT_COLORS[verdict] || 'text-slate-400';
 
-  const getEntityIcon = (type: EntityType) => {
-    switch (type) {
-      case EntityType.PHONE: return 'fa-phone';
-      case EntityType.URL: return 'fa-link';
-      case EntityType.EMAIL: return 'fa-envelope';
-      case EntityType.CRYPTO_WALLET: return 'fa-wallet';
-      default: return 'fa-building';
-    }
-  };
+const getEntityIcon = (type: EntityType) => ENTITY_ICONS[type] || 'fa-building';
 
+const ReportDashboard: React.FC<ReportDashboardProps> = ({ result, onReset }) => {
   return (
     <div className="w-full max-w-5xl mx-auto space-y-6 animate-fade-in-up pb-12">
       
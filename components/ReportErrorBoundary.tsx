@@ -0,0 +1,37 @@
+import React from 'react';
+import ErrorPanel from './ErrorPanel';
+
+interface ReportErrorBoundaryProps {
+  children: React.ReactNode;
+}
+
+interface ReportErrorBoundaryState {
+  failed: boolean;
+}
+
+// Catches a failed chunk fetch for the lazy report as well as render errors
+// inside it, so neither unmounts the whole app after a successful analysis
+class ReportErrorBoundary extends React.Component<
+  ReportErrorBoundaryProps,
+  ReportErrorBoundaryState
+> {
+  state: ReportErrorBoundaryState = { failed: false };
+
+  static getDerivedStateFromError(): ReportErrorBoundaryState {
+    return { failed: true };
+  }
+
+  render() {
+    if (!this.state.failed) return this.props.children;
+    return (
+      <ErrorPanel
+        title="Report Unavailable"
+        message="Something went wrong while displaying the report. Reload the page to try again."
+        actionLabel="Reload"
+        onAction={() => window.location.reload()}
+      />
+    );
+  }
+}
+
+export default ReportErrorBoundary;
@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useMemo } from 'react';
 import { PieChart, Pie, Cell, ResponsiveContainer } from 'recharts';
 
 interface RiskGaugeProps {
@@ -6,10 +6,14 @@ interface RiskGaugeProps {
 }
 
 const RiskGauge: React.FC<RiskGaugeProps> = ({ score }) => {
-  const data = [
-    { name: 'Score', value: score },
-    { name: 'Remaining', value: 100 - score },
-  ];
+  // Stable per score so recharts doesn't re-run its layout/animation on re-render
+  const data = useMemo(
+    () => [
+      { name: 'Score', value: score },
+      { name: 'Remaining', value: 100 - score },
+    ],
+    [score]
+  );
 
   // Determine color based on score
   let color = '#10b981'; // Emerald (Safe)
@@ -46,4 +50,4 @@ const RiskGauge: React.FC<RiskGaugeProps> = ({ score }) => {
   );
 };
 
-export default RiskGauge;
\ No newline at end of file
+export default React.memo(RiskGauge);
\ No newline at end of file
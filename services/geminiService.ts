@@ -1,32 +1,342 @@
-import { GoogleGenAI } from '@google/genai';
-import { VerificationResult, Verdict, EntityType } from '../types';
+import {
+  GoogleGenAI,
+  GenerateContentConfig,
+  GenerateContentParameters,
+  GenerateContentResponse,
+} from '@google/genai';
+import { Entity, VerificationResult, Verdict, EntityType } from '../types';
+
+// Created on first use and shared by every request
+let client: GoogleGenAI | null = null;
 
 const getClient = () => {
+  if (client) return client;
   const apiKey = process.env.API_KEY;
   if (!apiKey) {
     throw new Error('API_KEY environment variable is missing.');
   }
-  return new GoogleGenAI({ apiKey });
+  client = new GoogleGenAI({ apiKey });
+  return client;
+};
+
+const MAX_ATTEMPTS = 3;
+const RETRY_BASE_DELAY_MS = 1000;
+
+// Rate limits, timeouts, 5xx and dropped connections are worth another try;
+// bad requests and auth failures are not
+const isTransientError = (error: any): boolean => {
+  const status = error?.status;
+  if (typeof status === 'number') {
+    return status === 408 || status === 429 || status >= 500;
+  }
+  // fetch rejects with a bare TypeError on network failure. The wording
+  // differs by browser ("Failed to fetch", "NetworkError when attempting to
+  // fetch resource.", "Load failed"), so match it rather than retrying every
+  // TypeError, which would also replay our own bugs
+  return (
+    error instanceof TypeError &&
+    /failed to fetch|networkerror|load failed|network/i.test(error.message)
+  );
+};
+
+const generateWithRetry = async (
+  ai: GoogleGenAI,
+  params: GenerateContentParameters
+): Promise<GenerateContentResponse> => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await ai.models.generateContent(params);
+    } catch (error) {
+      if (attempt >= MAX_ATTEMPTS || !isTransientError(error)) throw error;
+      // Exponential backoff with jitter: ~1s, ~2s
+      const delay =
+        RETRY_BASE_DELAY_MS * 2 ** (attempt - 1) * (0.5 + Math.random() / 2);
+      console.warn(`Gemini call failed, retrying in ${Math.round(delay)}ms`, error);
+      await new Promise((r) => setTimeout(r, delay));
+    }
+  }
+};
+
+type CacheEntry = { result: VerificationResult; expiresAt: number };
+
+// Bounded, expiring result cache. Grounding results (scam reports, registry
+// status, news coverage) go stale, so entries are dropped after ttlMs and the
+// oldest insertion is evicted past maxEntries. With a storageKey the cache is
+// also kept in localStorage (unencrypted, including any extracted phone
+// numbers and wallets) so a reload or a newly opened tab reuses recent
+// results; tabs that are already open only see each other's entries once
+// they next write.
+const createResultCache = ({
+  maxEntries,
+  ttlMs,
+  storageKey,
+}: {
+  maxEntries: number;
+  ttlMs: number;
+  storageKey?: string;
+}) => {
+  const readStored = (): Map<string, CacheEntry> => {
+    if (!storageKey) return new Map();
+    try {
+      const raw = globalThis.localStorage?.getItem(storageKey);
+      const stored: Array<[string, CacheEntry]> = raw ? JSON.parse(raw) : [];
+      const now = Date.now();
+      return new Map(stored.filter(([, entry]) => entry.expiresAt > now));
+    } catch {
+      return new Map();
+    }
+  };
+
+  let entries = readStored();
+
+  // localStorage writes are synchronous, so serialise off the path that
+  // returns the result and coalesce bursts of inserts into one write
+  let persistScheduled = false;
+
+  const persist = () => {
+    if (!storageKey || persistScheduled) return;
+    persistScheduled = true;
+    const write = () => {
+      persistScheduled = false;
+      // Other tabs write the same key, so merge with what is stored now
+      // rather than overwriting it; this tab's entries count as newest
+      const merged = readStored();
+      const now = Date.now();
+      for (const [key, entry] of entries) {
+        if (entry.expiresAt <= now) continue;
+        merged.delete(key);
+        merged.set(key, entry);
+      }
+      while (merged.size > maxEntries) {
+        merged.delete(merged.keys().next().value!);
+      }
+      entries = merged;
+      try {
+        globalThis.localStorage?.setItem(
+          storageKey,
+          JSON.stringify(Array.from(merged))
+        );
+      } catch (e) {
+        // Storage full or disabled; the in-memory cache still works
+        console.warn('Could not persist result cache', e);
+      }
+    };
+    if (typeof requestIdleCallback === 'function') requestIdleCallback(write);
+    else setTimeout(write, 0);
+  };
+
+  return {
+    get(key: string): VerificationResult | undefined {
+      const entry = entries.get(key);
+      if (!entry) return undefined;
+      if (entry.expiresAt <= Date.now()) {
+        entries.delete(key);
+        return undefined;
+      }
+      return entry.result;
+    },
+    set(key: string, result: VerificationResult) {
+      entries.delete(key);
+      // Map iterates in insertion order, so the first key is the oldest entry
+      if (entries.size >= maxEntries) {
+        entries.delete(entries.keys().next().value!);
+      }
+      entries.set(key, { result, expiresAt: Date.now() + ttlMs });
+      persist();
+    },
+  };
+};
+
+// Flyer results keyed by image content hash, so re-submitting the same image
+// skips the whole analysis round-trip.
+const flyerCache = createResultCache({
+  maxEntries: 64,
+  ttlMs: 60 * 60 * 1000,
+  storageKey: 'astrashield:flyer-cache',
+});
+
+// Claim results keyed by normalised text; the monitoring feed and repeated
+// manual checks often submit the same headline. News moves faster than
+// flyers, so these expire sooner.
+const claimCache = createResultCache({
+  maxEntries: 128,
+  ttlMs: 10 * 60 * 1000,
+});
+
+const hashImage = async (image: Blob): Promise<string | null> => {
+  // crypto.subtle is only exposed in secure contexts (https / localhost)
+  if (!globalThis.crypto?.subtle) return null;
+  const digest = await crypto.subtle.digest(
+    'SHA-256',
+    await image.arrayBuffer()
+  );
+  return Array.from(new Uint8Array(digest), (b) =>
+    b.toString(16).padStart(2, '0')
+  ).join('');
+};
+
+// Tolerate ```JSON, CRLF line endings and fences without a newline; the
+// model isn't consistent about any of them
+const JSON_FENCE = /```json\s*([\s\S]*?)\s*```/i;
+const ANY_FENCE = /```[a-z]*\s*([\s\S]*?)```/i;
+
+// Extract JSON from potential markdown code blocks
+const extractJson = (text: string): string => {
+  const fenced = (text.match(JSON_FENCE) || text.match(ANY_FENCE))?.[1].trim();
+  if (fenced?.startsWith('{')) return fenced;
+  // sometimes it might just be the object, or a fence held something else
+  const firstBrace = text.indexOf('{');
+  const lastBrace = text.lastIndexOf('}');
+  if (firstBrace !== -1 && lastBrace !== -1) {
+    return text.substring(firstBrace, lastBrace + 1);
+  }
+  return text;
+};
+
+// Extract grounding sources if available
+const extractSources = (
+  response: GenerateContentResponse
+): VerificationResult['sources'] => {
+  // Keyed by URI: grounding often cites the same page for several claims
+  const sources = new Map<string, VerificationResult['sources'][number]>();
+  const chunks = response.candidates?.[0]?.groundingMetadata?.groundingChunks;
+  for (const chunk of chunks ?? []) {
+    const web = chunk.web;
+    if (web?.uri && !sources.has(web.uri)) {
+      sources.set(web.uri, { title: web.title || 'Web Source', uri: web.uri });
+    }
+  }
+  return Array.from(sources.values());
+};
+
+// The model often lists the same number/URL once per place it appears on the
+// flyer; keep the first mention, but never drop a flag raised on a repeat.
+// Runs on mapped entities so the key uses the type actually displayed.
+const dedupeEntities = (entities: Entity[]): Entity[] => {
+  const seen = new Map<string, Entity>();
+  for (const e of entities) {
+    const key = `${e.type}|${e.value.trim().toLowerCase()}`;
+    const existing = seen.get(key);
+    if (!existing) seen.set(key, e);
+    else if (e.isFlagged && !existing.isFlagged) {
+      existing.isFlagged = true;
+      existing.verificationStatus = e.verificationStatus;
+    }
+  }
+  return Array.from(seen.values());
+};
+
+const MAX_IMAGE_EDGE = 1600;
+// Gemini caps inline requests at 20MB, and base64 inflates the image by ~4/3
+const MAX_INLINE_IMAGE_BYTES = 15 * 1024 * 1024;
+// Lossless/uncompressed uploads above this are worth transcoding to JPEG
+const TRANSCODE_MIN_BYTES = 512 * 1024;
+
+// Phone photos are often 4000px+ on the long edge; the vision model gains
+// nothing past ~1600px, so shrink before upload. Large PNG/BMP screenshots are
+// re-encoded as JPEG even at full size, which typically halves the bytes (and
+// the base64 payload). Returns the original file when it is already compact
+// or cannot be decoded here.
+const downscaleImage = async (file: File): Promise<Blob> => {
+  const transcode =
+    file.type !== 'image/jpeg' && file.size > TRANSCODE_MIN_BYTES;
+
+  let bitmap: ImageBitmap;
+  try {
+    // The canvas re-encode drops EXIF, so apply its orientation to the pixels
+    // here; otherwise rotated phone photos reach the model sideways
+    bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+  } catch {
+    return file;
+  }
+
+  const scale = Math.min(
+    1,
+    MAX_IMAGE_EDGE / Math.max(bitmap.width, bitmap.height)
+  );
+  const canvas =
+    scale < 1 || transcode ? document.createElement('canvas') : null;
+  const ctx = canvas?.getContext('2d');
+  if (!canvas || !ctx) {
+    bitmap.close();
+    return file;
+  }
+
+  canvas.width = Math.round(bitmap.width * scale);
+  canvas.height = Math.round(bitmap.height * scale);
+  // JPEG has no alpha; keep transparent flyers legible on white
+  ctx.fillStyle = '#ffffff';
+  ctx.fillRect(0, 0, canvas.width, canvas.height);
+  ctx.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+  bitmap.close();
+
+  const blob = await new Promise<Blob | null>((resolve) =>
+    canvas.toBlob(resolve, 'image/jpeg', 0.85)
+  );
+  if (!blob) return file;
+  // A transcode-only pass is pointless if it didn't save bytes; a resized
+  // image is always kept, since Gemini bills image tokens by pixels, not bytes
+  return scale === 1 && blob.size >= file.size ? file : blob;
 };
 
 // Helper to convert file to Base64
-export const fileToGenerativePart = async (file: File): Promise<string> => {
+const fileToGenerativePart = async (file: Blob): Promise<string> => {
   return new Promise((resolve, reject) => {
     const reader = new FileReader();
     reader.onloadend = () => {
       const base64String = reader.result as string;
       // Remove data url prefix (e.g. "data:image/jpeg;base64,")
-      const base64Data = base64String.split(',')[1];
-      resolve(base64Data);
+      resolve(base64String.slice(base64String.indexOf(',') + 1));
     };
     reader.onerror = reject;
     reader.readAsDataURL(file);
   });
 };
 
+// Shared by both analyses; built once rather than per request. No output
+// token cap or JSON mime type: the report size varies with the number of
+// entities, and responseMimeType can't be combined with the search tool.
+const GROUNDED_CONFIG: GenerateContentConfig = {
+  tools: [{ googleSearch: {} }],
+  temperature: 0.1, // Low temperature for analytical precision
+};
+
+// Static, so built once at module load rather than on every upload
+const FLYER_PROMPT = `
+  Act as a Forensic Disaster Relief Analyst. Your job is to verify the legitimacy of the "Call for Help" flyer or image provided.
+  
+  PERFORM THE FOLLOWING STEPS:
+  1. EXTRACT: Identify all phone numbers, URLs, email addresses, organization names, and crypto wallet addresses from the image.
+  2. INVESTIGATE: Use the Google Search tool to verify these entities. 
+     - Check if the organization exists and is a registered non-profit/NGO.
+     - Check if the phone numbers or URLs are reported in scam databases.
+     - specific queries: "is [domain] legit", "[phone number] scam report", "[org name] official site".
+  3. ANALYZE: specific indicators of fraud (urgency, poor grammar, requesting crypto/gift cards, mismatching domains).
+  4. REPORT: Return a JSON object with your findings.
+
+  OUTPUT FORMAT:
+  You MUST return the result in a raw JSON code block. Do not include markdown formatting like \`\`\`json.
+  
+  The JSON structure must be:
+  {
+    "riskScore": number (0-100, where 100 is definite scam),
+    "verdict": "SAFE" | "SUSPICIOUS" | "SCAM",
+    "summary": "A short executive summary of the investigation.",
+    "entities": [
+      { "type": "PHONE"|"URL"|"EMAIL"|"ORGANIZATION"|"CRYPTO_WALLET", "value": "extracted value", "verificationStatus": "What you found about this specific entity", "isFlagged": boolean }
+    ],
+    "evidencePoints": ["List of specific reasons for the score"],
+    "recommendation": "Actionable advice for the user"
+  }
+`;
+
 export const verifyTextClaim = async (
   text: string
 ): Promise<VerificationResult> => {
+  const cacheKey = text.trim().replace(/\s+/g, ' ').toLowerCase();
+  const cached = claimCache.get(cacheKey);
+  if (cached) return cached;
+
   const ai = getClient();
   const prompt = `
     Verify the following news headline or claim for accuracy.
@@ -52,27 +362,13 @@ export const verifyTextClaim = async (
   `;
 
   try {
-    const response = await ai.models.generateContent({
+    const response = await generateWithRetry(ai, {
       model: 'gemini-2.5-flash',
       contents: { text: prompt },
-      config: {
-        tools: [{ googleSearch: {} }],
-        temperature: 0.1,
-      },
+      config: GROUNDED_CONFIG,
     });
 
-    const responseText = response.text || '{}';
-    let cleanJson = responseText;
-    const jsonMatch =
-      responseText.match(/```json\n([\s\S]*?)\n```/) ||
-      responseText.match(/```([\s\S]*?)```/);
-    if (jsonMatch) cleanJson = jsonMatch[1];
-    else {
-      const first = responseText.indexOf('{');
-      const last = responseText.lastIndexOf('}');
-      if (first !== -1 && last !== -1)
-        cleanJson = responseText.substring(first, last + 1);
-    }
+    const cleanJson = extractJson(response.text || '{}');
 
     let data;
     try {
@@ -82,32 +378,21 @@ export const verifyTextClaim = async (
       data = {};
     }
 
-    // Extract grounding sources if available (Same logic as analyzeFlyer)
-    const sources: Array<{ title: string; uri: string }> = [];
-    if (response.candidates?.[0]?.groundingMetadata?.groundingChunks) {
-      response.candidates[0].groundingMetadata.groundingChunks.forEach(
-        (chunk: any) => {
-          if (chunk.web?.uri) {
-            sources.push({
-              title: chunk.web.title || 'Web Source',
-              uri: chunk.web.uri,
-            });
-          }
-        }
-      );
-    }
+    const sources = extractSources(response);
 
-    return {
+    const result: VerificationResult = {
       verdict: (data.verdict as Verdict) || Verdict.SAFE,
       riskScore: data.riskScore || 0,
       summary: data.summary || 'Verified news source.',
       entities: Array.isArray(data.entities)
-        ? data.entities.map((e: any) => ({
-            type: EntityType.ORGANIZATION,
-            value: e.value || 'Unknown',
-            verificationStatus: e.verificationStatus || 'Analyzed',
-            isFlagged: !!e.isFlagged,
-          }))
+        ? dedupeEntities(
+            data.entities.map((e: any) => ({
+              type: EntityType.ORGANIZATION,
+              value: String(e.value || 'Unknown'),
+              verificationStatus: e.verificationStatus || 'Analyzed',
+              isFlagged: !!e.isFlagged,
+            }))
+          )
         : [],
       evidencePoints: Array.isArray(data.evidencePoints)
         ? data.evidencePoints
@@ -115,6 +400,11 @@ export const verifyTextClaim = async (
       recommendation: data.recommendation || 'Check official sources.',
       sources: sources,
     };
+
+    // Only cache real verdicts; an empty, blocked or unparseable reply falls
+    // back to the SAFE default, which must not be pinned
+    if (data.verdict) claimCache.set(cacheKey, result);
+    return result;
   } catch (error) {
     console.error('Verification failed', error);
     return {
@@ -130,77 +420,43 @@ export const verifyTextClaim = async (
 };
 
 export const analyzeFlyer = async (
-  base64Image: string,
-  mimeType: string
+  file: File,
+  onProgress?: (step: string) => void
 ): Promise<VerificationResult> => {
-  const ai = getClient();
+  // Keyed on the uploaded bytes, so a repeat upload skips the downscale and
+  // base64 encode as well as the Gemini call
+  const cacheKey = await hashImage(file);
+  const cached = cacheKey ? flyerCache.get(cacheKey) : undefined;
+  if (cached) return cached;
 
-  const prompt = `
-    Act as a Forensic Disaster Relief Analyst. Your job is to verify the legitimacy of the "Call for Help" flyer or image provided.
-    
-    PERFORM THE FOLLOWING STEPS:
-    1. EXTRACT: Identify all phone numbers, URLs, email addresses, organization names, and crypto wallet addresses from the image.
-    2. INVESTIGATE: Use the Google Search tool to verify these entities. 
-       - Check if the organization exists and is a registered non-profit/NGO.
-       - Check if the phone numbers or URLs are reported in scam databases.
-       - specific queries: "is [domain] legit", "[phone number] scam report", "[org name] official site".
-    3. ANALYZE: specific indicators of fraud (urgency, poor grammar, requesting crypto/gift cards, mismatching domains).
-    4. REPORT: Return a JSON object with your findings.
-
-    OUTPUT FORMAT:
-    You MUST return the result in a raw JSON code block. Do not include markdown formatting like \`\`\`json.
-    
-    The JSON structure must be:
-    {
-      "riskScore": number (0-100, where 100 is definite scam),
-      "verdict": "SAFE" | "SUSPICIOUS" | "SCAM",
-      "summary": "A short executive summary of the investigation.",
-      "entities": [
-        { "type": "PHONE"|"URL"|"EMAIL"|"ORGANIZATION"|"CRYPTO_WALLET", "value": "extracted value", "verificationStatus": "What you found about this specific entity", "isFlagged": boolean }
-      ],
-      "evidencePoints": ["List of specific reasons for the score"],
-      "recommendation": "Actionable advice for the user"
-    }
-  `;
+  const ai = getClient();
+  const image = await downscaleImage(file);
+  if (image.size > MAX_INLINE_IMAGE_BYTES) {
+    throw new Error(
+      `Image is too large (max ${MAX_INLINE_IMAGE_BYTES / (1024 * 1024)}MB after compression).`
+    );
+  }
+  const base64Image = await fileToGenerativePart(image);
+  onProgress?.('Scanning for Entities & Searching Database...');
 
   try {
-    const response = await ai.models.generateContent({
+    const response = await generateWithRetry(ai, {
       model: 'gemini-2.5-flash',
       contents: {
         parts: [
           {
             inlineData: {
-              mimeType: mimeType,
+              mimeType: image.type,
               data: base64Image,
             },
           },
-          { text: prompt },
+          { text: FLYER_PROMPT },
         ],
       },
-      config: {
-        tools: [{ googleSearch: {} }],
-        temperature: 0.1, // Low temperature for analytical precision
-      },
+      config: GROUNDED_CONFIG,
     });
 
-    console.log(response);
-
-    const text = response.text || '{}';
-
-    // Extract JSON from potential markdown code blocks
-    let cleanJson = text;
-    const jsonMatch =
-      text.match(/```json\n([\s\S]*?)\n```/) || text.match(/```([\s\S]*?)```/);
-    if (jsonMatch) {
-      cleanJson = jsonMatch[1];
-    } else {
-      // sometimes it might just be the object
-      const firstBrace = text.indexOf('{');
-      const lastBrace = text.lastIndexOf('}');
-      if (firstBrace !== -1 && lastBrace !== -1) {
-        cleanJson = text.substring(firstBrace, lastBrace + 1);
-      }
-    }
+    const cleanJson = extractJson(response.text || '{}');
 
     let parsedData: any;
     try {
@@ -210,20 +466,7 @@ export const analyzeFlyer = async (
       throw new Error('Analysis failed to produce structured data.');
     }
 
-    // Extract grounding sources if available
-    const sources: Array<{ title: string; uri: string }> = [];
-    if (response.candidates?.[0]?.groundingMetadata?.groundingChunks) {
-      response.candidates[0].groundingMetadata.groundingChunks.forEach(
-        (chunk: any) => {
-          if (chunk.web?.uri) {
-            sources.push({
-              title: chunk.web.title || 'Web Source',
-              uri: chunk.web.uri,
-            });
-          }
-        }
-      );
-    }
+    const sources = extractSources(response);
 
     // Map to our TypeScript interface
     const result: VerificationResult = {
@@ -231,12 +474,14 @@ export const analyzeFlyer = async (
       verdict: (parsedData.verdict as Verdict) || Verdict.SUSPICIOUS,
       summary: parsedData.summary || 'No summary provided.',
       entities: Array.isArray(parsedData.entities)
-        ? parsedData.entities.map((e: any) => ({
-            type: (e.type as EntityType) || EntityType.ORGANIZATION,
-            value: e.value || 'Unknown',
-            verificationStatus: e.verificationStatus || 'Unverified',
-            isFlagged: !!e.isFlagged,
-          }))
+        ? dedupeEntities(
+            parsedData.entities.map((e: any) => ({
+              type: (e.type as EntityType) || EntityType.ORGANIZATION,
+              value: String(e.value || 'Unknown'),
+              verificationStatus: e.verificationStatus || 'Unverified',
+              isFlagged: !!e.isFlagged,
+            }))
+          )
         : [],
       evidencePoints: Array.isArray(parsedData.evidencePoints)
         ? parsedData.evidencePoints
@@ -245,6 +490,9 @@ export const analyzeFlyer = async (
       sources: sources,
     };
 
+    // An empty or blocked reply maps to the SUSPICIOUS defaults; caching that
+    // (and persisting it) would stop a re-upload from ever recovering
+    if (cacheKey && parsedData.verdict) flyerCache.set(cacheKey, result);
     return result;
   } catch (error) {
     console.error('Gemini Analysis Error:', error);